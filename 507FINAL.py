@@ -1,23 +1,34 @@
 import requests
-import json
+import orjson
+import ijson
 import sqlite3
 import secrets
-from bs4 import BeautifulSoup
+from lxml import etree
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 import datetime
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 
-CACHE_FILE_NAME = "bird_cache.json"
 DB_NAME = 'bird.sqlite'
-CACHE_DICT = {}
-
-def load_cache():
-    '''
-    Opens a cache dictionary of a specified name if it is in the active directory- otherwise creates a new cache dictionary.
-
-    Attempts to open a json cache file of a name that is specified by global variable "CACHE_FILE_NAME". Converts the
-    contents of the cache file into a dictionary and returns the dictionary. If the cache file of the specified name
-    cannot be opened, creates an empty dictionary and returns it.
+CACHE_PARSED = {}
+with open('statelist.json', 'rb') as state_file:
+    STATES = orjson.loads(state_file.read())
+SESSION = requests.Session()
+SESSION.mount('https://', requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16))
+IMG_XPATH = etree.XPath("(//div[contains(concat(' ', @class, ' '), ' AspectRatioContent ')])[1]//img/@src")
+STATUS_XPATH = etree.XPath("//div[@class='u-text-3 Tooltip Tooltip--sm']")
+TOOLBAR_XPATH = etree.XPath("//div[@class='Toolbar-group Toolbar-group--secondary']")
+TOOLBAR_ITEM_XPATH = etree.XPath(".//div[contains(concat(' ', @class, ' '), ' Toolbar-item ')]")
+HTML_PARSER = etree.HTMLParser(encoding='utf-8')
+
+def open_db():
+    '''Opens a connection to the sqlite database specified by "DB_NAME" (bird.sqlite) and tunes it for fast writes.
+
+    Connects to the database and sets the journal mode to WAL, only syncs to disk at WAL checkpoints rather than on
+    every commit, and keeps temporary tables and indexes in memory. The counties and sightings tables are rebuilt by
+    create_tables() on every run, but the cache table is kept between runs, so synchronous is NORMAL rather than OFF:
+    under WAL that cannot corrupt the database on a crash and only risks losing the last few commits.
 
     Parameters
     ----------
@@ -25,83 +36,95 @@ def load_cache():
 
     Returns
     -------
-    dict
-        A dictionary that either contains the converted contents of the json cache file or is empty.
-    '''
-    try:
-        cache_file = open(CACHE_FILE_NAME, 'r')
-        cache_file_contents = cache_file.read()
-        CACHE_DICT = json.loads(cache_file_contents)
-        cache_file.close()
-
-    except:
-        CACHE_DICT = {}
-
-    return CACHE_DICT
-
-
-def save_cache(cache):
-    ''' Opens a json cache file of a globally specified name and writes the cache dictionary to the cache file.
-
-    Opens a json cache file of a name that is specified by local variable "CACHE_FILE_NAME". Writes the contents of the
-    cache dictionary to the cache file.
-
-    Parameters
-    ----------
-    cache: dict
-        Contains the contents to be saved to the cache file.
-
-    Returns
-    -------
-    none
+    sqlite3.Connection
+        An open connection to the sqlite database.
     '''
-    # t = type(cache)
-
-    cache_file = open(CACHE_FILE_NAME, 'w')
-    contents_to_write = json.dumps(cache)
-    cache_file.write(contents_to_write)
-    cache_file.close()
+    conn = sqlite3.connect(DB_NAME)
+    conn.executescript('''
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-20000;
+    ''')
+    return conn
 
 
-def make_url_request_using_cache(url, cache):
-    ''' Uses a url to search the cache dictionary or alternatively, the internet, for html content. Saves the content.
+def make_url_request_using_cache(url, cache_key=None):
+    ''' Uses a url to search the cache table or alternatively, the internet, for html content. Saves the content.
 
-        Looks for a key-value pair in the cache dictionary with a key that is identical to a url. If such a key-value
-        pair is located, returns the value from the key-value pair. If not, gets HTML content from the internet
-        from the address indicated by the url. Converts the HTML to text. Adds a key-value pair to the dictionary
-        where the key is the url and the value is the HTML content. Saves the cache dictionary to a json file.
+        Looks for a row in the cache table of the sqlite database specified by "DB_NAME" (bird.sqlite) with a key that
+        is identical to cache_key, or to the url if no cache_key is given. If such a row is located, returns its
+        content. If not, gets HTML content from the internet from the address indicated by the url. Converts the HTML
+        to text. Adds a row to the cache table where the key is the cache key and the body is the HTML content.
 
         Parameters
         ----------
         url: string
-           The url that is used to search the cache dictionary or the internet
+           The url that is used to search the cache table or the internet
 
-        cache: dict
-            A dictionary containing content that has been acquired from the internet.
+        cache_key: string
+            An optional key to store the content under instead of the url, for urls that vary in ways that do not
+            change the content (such as the API key).
 
         Returns
         -------
         string
-            The value from the cache dictionary that corosponds to the url key.
+            The content from the cache table that corosponds to the url key.
         '''
-    if (url in cache.keys()):
+    if cache_key is None:
+        cache_key = url
+    conn = open_db()
+    cur = conn.cursor()
+    row = cur.execute('SELECT body FROM cache WHERE url = ?', (cache_key,)).fetchone()
+    if row is not None:
         print("\nUsing cache")
-        return cache[url]
+        conn.close()
+        return row[0].decode('utf-8')
 
     else:
         print("\nFetching")
-        response = requests.get(url)
-        cache[url] = response.text
-        save_cache(cache)
+        response = SESSION.get(url)
+        cur.execute('INSERT OR REPLACE INTO cache VALUES (?, ?)', (cache_key, response.text.encode('utf-8')))
+        conn.commit()
+        conn.close()
+
+        return response.text
+
+
+def get_json(url, cache_key=None):
+    '''Returns the parsed json content of a url, parsing it at most once per run.
+
+    Looks for the parsed content in the global dictionary "CACHE_PARSED" under cache_key, or under the url if no
+    cache_key is given. If it is not there, gets the text with make_url_request_using_cache, parses it, and stores the
+    result in "CACHE_PARSED" so that later calls for the same url skip the parse.
 
-        return cache[url]
+    Parameters
+    ----------
+    url: string
+        The url that is used to search the cache table or the internet
+
+    cache_key: string
+        An optional key to store the content under instead of the url.
+
+    Returns
+    -------
+    dict or list
+        The parsed json content of the url.
+    '''
+    if cache_key is None:
+        cache_key = url
+    if cache_key not in CACHE_PARSED:
+        CACHE_PARSED[cache_key] = orjson.loads(make_url_request_using_cache(url, cache_key))
+    return CACHE_PARSED[cache_key]
 
 
 def create_tables():
     '''Deletes counties and sightings sqlite tables if they exist, then creates the counties and sightings tables.
 
         Checks to see if the tables "counties" and "sightings" exist in the sqlite database specified by
-        "DB_NAME" (bird.sqlite). If they do, drops these tables. Then, creates the counties and sightings tables.
+        "DB_NAME" (bird.sqlite). If they do, drops these tables. Then, creates the counties and sightings tables and
+        the indexes used to look up sightings by county and counties by location code.
+        Also creates the cache table of fetched urls if it does not exist yet; it is kept between runs.
 
         Parameters
         ----------
@@ -109,9 +132,9 @@ def create_tables():
 
         Returns
         -------
-        None (But creates a counties table and sightings table)'''
+        None (But creates a counties table, a sightings table, and a cache table)'''
 
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
     create_counties_sql = '''
         CREATE TABLE IF NOT EXISTS "counties" (
@@ -138,6 +161,16 @@ def create_tables():
 
         )
     '''
+    create_cache_sql = '''
+        CREATE TABLE IF NOT EXISTS "cache" (
+            "url" TEXT PRIMARY KEY,
+            "body" BLOB
+        )
+    '''
+    create_indexes_sql = '''
+        CREATE INDEX IF NOT EXISTS "idx_sightings_county" ON "sightings" (County_Name, County_Index);
+        CREATE INDEX IF NOT EXISTS "idx_counties_loc" ON "counties" (Location_Code, state_count);
+    '''
     drop_counties = '''
         DROP TABLE IF EXISTS "counties";
     '''
@@ -148,6 +181,8 @@ def create_tables():
     cur.execute(drop_sightings)
     cur.execute(create_counties_sql)
     cur.execute(create_sightings_sql)
+    cur.execute(create_cache_sql)
+    cur.executescript(create_indexes_sql)
     conn.commit()
     conn.close()
     pass
@@ -155,8 +190,8 @@ def create_tables():
 def check_input(query, maximum, domain, action):
     '''Checks if variable, "query" is a string version of an integer. If not, prompts user for input until this is satisfied. If "query" is ever "exit", quits the program.
 
-    Checks if variable "query" is "exit", and exits the program if so. If not, checks if query has any non-numeric
-    characters, has any decimal points, or is outside the range of 1 to "maximum". If any of these are true,
+    Checks if variable "query" is "exit", and exits the program if so. If not, checks if query cannot be converted to
+    an integer or is outside the range of 1 to "maximum". If either of these is true,
     prompts the user for valid input and checks the input again. When the user has entered valid input (A string
     version of an integer), the corrected "query" (or the "query" that was correct on the first try) is returned.
 
@@ -183,19 +218,15 @@ def check_input(query, maximum, domain, action):
     while True:
         if query == "exit":
             exit()
-        if query.isnumeric():
-            if "." in query or "." in str(query):
-                query = input('Please choose a valid integer for the ' + domain + ' you would like to ' + action + ' or "exit":')
-                continue
-            if int(query) < 1 or int(query) > maximum:
-                query = input('Please choose a valid integer for the ' + domain + ' you would like to ' + action + ' or "exit":')
-                continue
-            else:
-                break
-        else:
+        try:
+            query_int = int(query)
+        except ValueError:
             query = input('Please choose a valid integer for the ' + domain + ' you would like to ' + action + ' or "exit":')
             continue
-    return query
+        if 1 <= query_int <= maximum:
+            # Normalized so that input like " 3" or "03" still matches the stored index
+            return str(query_int)
+        query = input('Please choose a valid integer for the ' + domain + ' you would like to ' + action + ' or "exit":')
 
 
 def populate_counties_DB(state_short, birdkey=secrets.ebirdkey):
@@ -218,32 +249,20 @@ def populate_counties_DB(state_short, birdkey=secrets.ebirdkey):
     ------
     None (But adds data to the counties database)
         '''
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
 
     insert_counties_sql = '''
-            INSERT INTO counties
+            INSERT OR IGNORE INTO counties
             VALUES (NULL, ?, ?, ?)
 
         '''
 
     state_code = 'US-' + state_short
     url1 = 'https://api.ebird.org/v2/ref/region/list/subnational2/' + state_code + '?key=' + birdkey
-    area_list = make_url_request_using_cache(url1, CACHE_DICT)
-    sample_area_json = json.loads(area_list)
-    count = 0
-    for item in sample_area_json:
-        count += 1
-        try:
-            cur.execute(insert_counties_sql,
-                        [
-                            count,
-                            item['code'],
-                            item['name'],
-                        ]
-                        )
-        except:
-            pass
+    sample_area_json = get_json(url1)
+    rows = [(count, item['code'], item['name']) for count, item in enumerate(sample_area_json, 1)]
+    cur.executemany(insert_counties_sql, rows)
     conn.commit()
     conn.close()
     pass
@@ -254,7 +273,8 @@ def populate_sightings_DB(county_choice, state_short, birdkey=secrets.ebirdkey):
     Uses county_choice and state_short (a state abbreviation) to assemble a query to the sqlite database specified by
     "DB_NAME". (bird.sqlite). The query returns a list with one tuple about a particular county. Parses a county code
     and county name from the tuple and uses it to assemble a query to the "Get Recent Observations" endpoint of the
-    eBird 2.0 API. Retrieves information about recent bird sightings and adds it to bird.sqlite. Returns county_name
+    eBird 2.0 API. If the county has no sightings in bird.sqlite yet, streams the recent bird sightings from the
+    response and adds them to bird.sqlite one at a time. Returns county_name
     (the name of the county represented by county_choice).
 
     Parameters:
@@ -275,42 +295,31 @@ def populate_sightings_DB(county_choice, state_short, birdkey=secrets.ebirdkey):
     county_name: string
         The name of the county retrieved from the sqlite query.
         '''
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
     result = cur.execute(
-        "select Location_Code, County from counties where state_count = " + county_choice + " and Location_Code like '%" + state_short + "%';").fetchall()
+        "select Location_Code, County from counties where state_count = ? and Location_Code glob ?;",
+        (county_choice, 'US-' + state_short + '-*')).fetchall()
     county_code = result[0][0]
     county_name = result[0][1]
     url = 'https://api.ebird.org/v2/data/obs/' + county_code + '/recent' + '?key=' + birdkey
-    print('\nFetching\n')
-    response = requests.get(url)
-    response_text = response.text
-    sightings_json = json.loads(response_text)
 
     insert_sightings_sql = '''
                 INSERT INTO sightings
                 VALUES (NULL, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
 
             '''
-    county_index = 0
-    id_list = cur.execute("select Id from sightings where County_Name = '" + county_name + "'").fetchall()
+    id_list = cur.execute("select Id from sightings where County_Name = ?", (county_name,)).fetchall()
     if len(id_list) == 0:
-        for item in sightings_json:
-            county_index += 1
-            cur.execute(insert_sightings_sql,
-                        [
-                            county_name,
-                            county_index,
-                            item['speciesCode'],
-                            item['comName'],
-                            item['sciName'],
-                            item['locName'],
-                            item['obsDt'],
-                            item['lat'],
-                            item['lng'],
-                            item['locationPrivate']
-                        ]
-                        )
+        print('\nFetching\n')
+        response = SESSION.get(url, stream=True)
+        response.raw.decode_content = True
+        sightings_json = ijson.items(response.raw, 'item', use_float=True)
+        rows = ((county_name, county_index, item['speciesCode'], item['comName'], item['sciName'], item['locName'],
+                 item['obsDt'], item['lat'], item['lng'], item['locationPrivate'])
+                for county_index, item in enumerate(sightings_json, 1))
+        cur.executemany(insert_sightings_sql, rows)
+        response.close()
     else:
         pass
     conn.commit()
@@ -339,9 +348,9 @@ def create_county_list(state_short, state_name):
         The number of counties represented in the data returned by the query.
     '''
 
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
-    result = cur.execute("select Id, state_count, Location_Code, County from counties where Location_Code like '%" + state_short + "%';").fetchall()
+    result = cur.execute("select Id, state_count, Location_Code, County from counties where Location_Code glob ? order by state_count;", ('US-' + state_short + '-*',)).fetchall()
     print('\nLIST OF COUNTIES IN ' + state_name.upper())
     county_count = 0
     for item in result:
@@ -367,9 +376,9 @@ def create_sightings_list(county_name):
         The number of sightings represented in the data returned by the query.
     '''
     sighting_count = 0
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
-    result = cur.execute('select County_Index, Common_Name, Scientific_Name, Location_Name, Observation_Date from sightings where County_Name = "' + county_name + '"').fetchall()
+    result = cur.execute('select County_Index, Common_Name, Scientific_Name, Location_Name, Observation_Date from sightings where County_Name = ?', (county_name,)).fetchall()
 
     print('LIST OF BIRD SIGHTINGS IN ' + county_name.upper())
 
@@ -403,13 +412,14 @@ def reverse_geocode(sighting_choice, county_name, liqkey=secrets.liqkey):
         A string representing the address of the bird siting that the user queried.
     '''
 
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
-    result = cur.execute('select Lat, Long from sightings where County_Index = ' + sighting_choice + ' and County_Name = "' + county_name + '";').fetchall()
+    result = cur.execute('select Lat, Long from sightings where County_Index = ? and County_Name = ?;', (str(int(sighting_choice)), county_name)).fetchall()
     url3 = 'https://us1.locationiq.com/v1/reverse.php?key=' + liqkey + '&lat=' + str(result[0][0]) + '&lon=' + str(
         result[0][1]) + '&format=json'
-    address_parent_response = make_url_request_using_cache(url3, CACHE_DICT)
-    address_parent_json = json.loads(address_parent_response)
+    # Keyed by rounded coordinates so that nearby duplicate hotspots and different API keys share one entry
+    geo_key = f"geo:{float(result[0][0]):.5f},{float(result[0][1]):.5f}"
+    address_parent_json = get_json(url3, geo_key)
     address_response = address_parent_json["display_name"]
     return address_response
 
@@ -437,51 +447,48 @@ def scrape_species_page(sighting_choice, county_name):
         Contains key value pairs representing a bird specie's status, and its taxonomic classification. Also has an image url.
     '''
     species_page_data = {'img_url': '', 'status': '', 'taxonomy': ''}
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
     species_code_response = cur.execute(
-        'select Species_Code from sightings where County_Index = ' + sighting_choice + ' and County_Name = "' + county_name + '";').fetchall()
+        'select Species_Code from sightings where County_Index = ? and County_Name = ?;', (str(int(sighting_choice)), county_name)).fetchall()
     species_code_parsed = species_code_response[0][0]
     species_url = 'https://birdsna.org/Species-Account/bna/species/' + str(species_code_parsed) + '/introduction'
-    homepage_dict = make_url_request_using_cache(species_url, CACHE_DICT)
-    homepage_soup = BeautifulSoup(homepage_dict, 'html.parser')
+    homepage_dict = make_url_request_using_cache(species_url)
+    # lxml rejects str input that carries an XML encoding declaration, so hand it bytes with the encoding pinned
+    homepage_tree = etree.HTML(homepage_dict.encode('utf-8'), HTML_PARSER)
 
-    pic_block = homepage_soup.find('div', class_='AspectRatioContent')
-    pic_parent = pic_block.find('img')
-    pic_url = pic_parent['src']
+    pic_url = IMG_XPATH(homepage_tree)[0]
     species_page_data['img_url'] = pic_url
 
     badge = ''
-    badge_parent = homepage_soup.find('div', class_='u-text-3 Tooltip Tooltip--sm')
-    if badge_parent == None:
+    badge_parent = STATUS_XPATH(homepage_tree)
+    if len(badge_parent) == 0:
         badge = 'Status not listed'
     else:
-        pre_badge = (badge_parent.text).split()
+        pre_badge = badge_parent[0].xpath('string()').split()
         badge_parts = pre_badge[1:]
         for part in badge_parts:
             badge += part + ' '
     species_page_data['status'] = badge
 
     taxonomy_dict = {1: '', 2: '', 3: ''}
-    order_parent = homepage_soup.find('div', class_='Toolbar-group Toolbar-group--secondary')
-    toolbar_items = order_parent.find_all('div', class_='Toolbar-item')
+    order_parent = TOOLBAR_XPATH(homepage_tree)[0]
+    toolbar_items = TOOLBAR_ITEM_XPATH(order_parent)
     taxonomy_index = 0
     for item in toolbar_items:
         taxonomy_index += 1
-        classification = item.text.strip()
+        classification = item.xpath('string()').strip()
         taxonomy_dict[taxonomy_index] = classification
 
     species_page_data['taxonomy'] = taxonomy_dict
     return species_page_data
 
-def create_locations_chart(county_name):
-    '''Queries bird.sqlite for data about the locations with the 5 greatest amounts of sightings in a particular county and creates a scatterplot.
+def get_locations_trace(county_name):
+    '''Queries bird.sqlite for the locations with the 5 greatest amounts of sightings in a particular county and returns a bar trace.
 
     Uses county_name to create a query to the sqlite database specified by the global variable "DB_NAME" (bird.sqlite).
-    Query retrieves a list of tuples of the observation dates of all the county's recent bird sightings.
-    Creates a list of unique dates and a corrosponding list of amounts of bird sightings associated with those dates.
-    Uses Plotly to create a scatter plot showing the number of recent bird sightings per day across the last several
-    days and opens it on the user's browser. Returns "result"- which is the list of dictionaries returned by the query.
+    Query retrieves a list of tuples with the name, coordinates and number of sightings of the county's 5 locations with
+    the most recent bird sightings. Uses Plotly to create a horizontal bar trace of the number of sightings per location.
 
     Parameters:
     ----------
@@ -490,33 +497,26 @@ def create_locations_chart(county_name):
 
     Returns:
     --------
-    None (but creates a Plotly infogrpahic and opens it on the user's browser.)
+    go.Bar
+        A Plotly bar trace of the number of sightings at each location.
     '''
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
     result = cur.execute(
-        'SELECT Location_Name, Lat, Long, PrivateLocation, COUNT(Location_Name) FROM sightings WHERE County_Name = "' + county_name + '" GROUP BY Location_Name ORDER BY Count(Location_Name) DESC LIMIT 5').fetchall()
-    x_axis = []
-    y_axis = []
-    for location in result:
-        x_axis.append(int(location[4]))
-        y_string = location[0] + '  |  ' + 'lat: ' + str(location[1]) + ' / ' + 'long: ' + str(location[2] + '    ')
-        y_axis.append(y_string)
-    basic_layout = go.Layout(title="Recent Bird Sightings in " + county_name + " County")
-    fig = go.Figure(go.Bar(x=x_axis, y=y_axis, orientation='h'), layout=basic_layout)
-    fig.write_html("locationchart.html", auto_open=True)
-
+        'SELECT Location_Name, Lat, Long, COUNT(*) FROM sightings WHERE County_Name = ? GROUP BY Location_Name ORDER BY 4 DESC LIMIT 5',
+        (county_name,)).fetchall()
+    x_axis = [location[3] for location in result]
+    y_axis = [f"{location[0]}  |  lat: {location[1]} / long: {location[2]}    " for location in result]
     conn.close()
-    return result
+    return go.Bar(x=x_axis, y=y_axis, orientation='h')
 
-def create_sightings_scatterplot(county_name):
-    '''Queries bird.sqlite for dates of recent sightings in a particular county and creates a scatter plot.
+def get_sightings_trace(county_name):
+    '''Queries bird.sqlite for dates of recent sightings in a particular county and returns a scatter trace.
 
     Uses county_name to create a query to the sqlite database specified by the global variable "DB_NAME" (bird.qlite).
-    Query retrieves a list of tuples of the observation dates of all the county's recent bird sightings.
-    Creates a list of unique dates and a corrosponding list of amounts of bird sightings associated with those dates.
-    Uses Plotly to create a scatter plot showing the number of recent bird sightings per day across the last several
-    days and opens it on the user's browser.
+    Query retrieves a list of tuples of each unique observation date of the county's recent bird sightings and the
+    amount of bird sightings associated with that date. Uses Plotly to create a scatter trace showing the number of
+    recent bird sightings per day across the last several days.
 
     Parameters:
     ----------
@@ -525,43 +525,30 @@ def create_sightings_scatterplot(county_name):
 
     Returns:
     --------
-    None (but creates a Plotly infogrpahic and opens it on the user's browser.)'''
-    date_hist = {}
-    unique_dates = []
+    go.Scatter
+        A Plotly scatter trace of the number of sightings per day.'''
     y_axis_list = []
     x_axis_list = []
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
-    result = cur.execute('select Observation_Date from sightings where County_Name = "' + county_name + '" ORDER BY Observation_Date ASC;').fetchall()
+    result = cur.execute(
+        'select substr(Observation_Date, 1, 10) as date, COUNT(*) from sightings where County_Name = ? GROUP BY date ORDER BY date ASC;',
+        (county_name,)).fetchall()
 
-    for date_tuple in result:
-        date_parsed = date_tuple[0].split()[0]
-        if date_parsed in date_hist:
-            date_hist[date_parsed] += 1
-        else:
-            date_hist[date_parsed] = 1
-        if date_parsed in unique_dates:
-            pass
-        else:
-            unique_dates.append(date_parsed)
-    for date in unique_dates:
-        date_count = date_hist[date]
+    for date, date_count in result:
+        x_axis_list.append(datetime.date.fromisoformat(date))
         y_axis_list.append(date_count)
-        date_parts = date.split('-')
-        x_axis_list.append(datetime.datetime(year=int(date_parts[0]), month=int(date_parts[1]), day=int(date_parts[2])))
 
-    basic_layout = go.Layout(title="Recent Bird Sightings in " + county_name + " County")
-    fig = go.Figure(data=[go.Scatter(x=x_axis_list, y=y_axis_list)], layout=basic_layout)
-    fig.write_html("linegraph.html", auto_open=True)
-    pass
+    conn.close()
+    return go.Scatter(x=x_axis_list, y=y_axis_list)
 
-def create_private_pie(county_name):
-    '''Queries birds.sqlite for the numbers of recent bird sightings on private and on public property in a county. Creates a pie chart.
+def get_private_trace(county_name):
+    '''Queries birds.sqlite for the numbers of recent bird sightings on private and on public property in a county. Returns a pie trace.
 
-    Uses county_name to create two queries to the sqlite database specified by the global variable "DB_NAME" (bird.sqlite).
-    One query returns a list of one tuple with the number of recent bird sightings on public property. The other
-    query returns a list of one tuple with the number of recent bird sightings on private property. Uses Plotly to make
-    a pie chart with the percentage of bird sightings on public and on private property and opens them in the user's browser.
+    Uses county_name to create a query to the sqlite database specified by the global variable "DB_NAME" (bird.sqlite).
+    The query returns the number of recent bird sightings on private property and on public property, grouped by
+    whether the location is private. Uses Plotly to make a pie trace with the percentage of bird sightings on public
+    and on private property.
 
     Parameters:
     ----------
@@ -570,21 +557,98 @@ def create_private_pie(county_name):
 
     Returns:
     --------
-    None (but creates a Plotly infogrpahic and opens it in the user's browser.)
+    go.Pie
+        A Plotly pie trace of the sightings on private and on public property.
     '''
-    conn = sqlite3.connect(DB_NAME)
+    conn = open_db()
     cur = conn.cursor()
 
-    Private_Count = cur.execute('SELECT COUNT(PrivateLocation) from sightings WHERE PrivateLocation = 1 and County_Name = "' + county_name + '"').fetchall()
-    Public_Count = cur.execute('SELECT COUNT(PrivateLocation) from sightings WHERE PrivateLocation = 0 and County_Name = "' + county_name + '"').fetchall()
+    result = cur.execute('SELECT PrivateLocation, COUNT(*) from sightings WHERE County_Name = ? GROUP BY PrivateLocation', (county_name,)).fetchall()
+    counts = dict(result)
     labels = ['Private Property', 'Public Property']
-    values = [Private_Count[0][0], Public_Count[0][0]]
+    # PrivateLocation has TEXT affinity, so the stored booleans come back as '1' and '0'
+    values = [counts.get('1', 0), counts.get('0', 0)]
+
+    conn.close()
+    return go.Pie(labels=labels, values=values)
+
+def create_locations_chart(county_name):
+    '''Creates a bar chart of the locations with the 5 greatest amounts of sightings in a particular county.
+
+    Uses get_locations_trace to build the bar chart and opens it on the user's browser.
+
+    Parameters:
+    ----------
+    county_name: string
+        The name of a county.
 
+    Returns:
+    --------
+    None (but creates a Plotly infogrpahic and opens it on the user's browser.)
+    '''
+    basic_layout = go.Layout(title="Recent Bird Sightings in " + county_name + " County")
+    fig = go.Figure(get_locations_trace(county_name), layout=basic_layout)
+    fig.write_html("locationchart.html", auto_open=True)
+
+def create_sightings_scatterplot(county_name):
+    '''Creates a scatter plot of the number of recent sightings per day in a particular county.
 
+    Uses get_sightings_trace to build the scatter plot and opens it on the user's browser.
+
+    Parameters:
+    ----------
+    county_name: string
+        The name of a county.
+
+    Returns:
+    --------
+    None (but creates a Plotly infogrpahic and opens it on the user's browser.)'''
+    basic_layout = go.Layout(title="Recent Bird Sightings in " + county_name + " County")
+    fig = go.Figure(data=[get_sightings_trace(county_name)], layout=basic_layout)
+    fig.write_html("linegraph.html", auto_open=True)
+
+def create_private_pie(county_name):
+    '''Creates a pie chart of the proportions of recent bird sightings on private and on public property in a county.
+
+    Uses get_private_trace to build the pie chart and opens it in the user's browser.
+
+    Parameters:
+    ----------
+    county_name: string
+        The name of a county.
+
+    Returns:
+    --------
+    None (but creates a Plotly infogrpahic and opens it in the user's browser.)
+    '''
     basic_layout = go.Layout(title="Proportions of Sightings in Public and Private Property in " + county_name)
-    fig = go.Figure(data=[go.Pie(labels=labels, values=values)], layout = basic_layout)
+    fig = go.Figure(data=[get_private_trace(county_name)], layout = basic_layout)
     fig.write_html("pirivatepublicchart.html", auto_open=True)
 
+def create_summary_chart(county_name):
+    '''Creates a single infographic with the locations, sightings per day, and private/public charts side by side.
+
+    Used in place of the three separate charts when a county has too few sightings for them to be worth opening in
+    separate browser tabs. Places the traces from get_locations_trace, get_sightings_trace, and get_private_trace in one
+    row of subplots and opens it on the user's browser.
+
+    Parameters:
+    ----------
+    county_name: string
+        The name of a county.
+
+    Returns:
+    --------
+    None (but creates a Plotly infogrpahic and opens it on the user's browser.)
+    '''
+    fig = make_subplots(rows=1, cols=3, specs=[[{'type': 'xy'}, {'type': 'xy'}, {'type': 'domain'}]],
+                        subplot_titles=['Top Locations', 'Sightings per Day', 'Private and Public Property'])
+    fig.add_trace(get_locations_trace(county_name), row=1, col=1)
+    fig.add_trace(get_sightings_trace(county_name), row=1, col=2)
+    fig.add_trace(get_private_trace(county_name), row=1, col=3)
+    fig.update_layout(title="Recent Bird Sightings in " + county_name + " County", showlegend=False)
+    fig.write_html("summarychart.html", auto_open=True)
+
 def create_taxonomy_table(species_page_data, address):
     '''Parses data from species_page_data and uses it to create a table presenting the data. Also displays address data in the table.
 
@@ -636,9 +700,6 @@ def create_taxonomy_table(species_page_data, address):
 if __name__ == "__main__":
     create_tables()
     firstquery = True
-    CACHE_DICT = load_cache()
-    state_json = open('statelist.json', 'r')
-    states = json.load(state_json)
     if firstquery == True:
         state = input('\nWelcome! To get started searching for bird sitings info, enter the name of the state you would like to query, or "exit": ')
     while True:
@@ -649,14 +710,14 @@ if __name__ == "__main__":
         if state == "exit":
             exit()
         else:
-            if state.lower() in states:
-                state_short = states[state.lower()]
+            if state.lower() in STATES:
+                state_short = STATES[state.lower()]
                 firstquery = False
             else:
                 while True:
                     state = input("Please enter a valid state:")
-                    if state.lower() in states:
-                        state_short = states[state.lower()]
+                    if state.lower() in STATES:
+                        state_short = STATES[state.lower()]
                         firstquery = False
                         break
                     elif state == "exit":
@@ -671,15 +732,21 @@ if __name__ == "__main__":
             county_name = populate_sightings_DB(county_choice, state_short)
             sighting_max = create_sightings_list(county_name)
             if sighting_max > 0:
-                create_locations_chart(county_name)
-                create_sightings_scatterplot(county_name)
-                create_private_pie(county_name)
+                if sighting_max < 3:
+                    create_summary_chart(county_name)
+                else:
+                    with ThreadPoolExecutor(3) as executor:
+                        charts = [create_locations_chart, create_sightings_scatterplot, create_private_pie]
+                        list(executor.map(lambda create_chart: create_chart(county_name), charts))
                 sighting_choice = input(
                     '\nRelevant items have been opened in your deafult browser.\n-----\nSelect the integer of the bird sighting you would like to learn more about, "exit": ')
                 sighting_choice = check_input(sighting_choice, sighting_max, "bird sighting", "learn more about")
-                address_response = reverse_geocode(sighting_choice, county_name)
+                with ThreadPoolExecutor(2) as executor:
+                    address_future = executor.submit(reverse_geocode, sighting_choice, county_name)
+                    species_page_future = executor.submit(scrape_species_page, sighting_choice, county_name)
+                address_response = address_future.result()
                 try:
-                    species_page_data = scrape_species_page(sighting_choice, county_name)
+                    species_page_data = species_page_future.result()
                     bird_pic = species_page_data['img_url']
                     webbrowser.open(bird_pic)
                     create_taxonomy_table(species_page_data, address_response)